@@ -89,7 +89,7 @@ TARGET_SYSTEMD_SERVICE="/etc/systemd/system/${SERVICE_NAME}"
 
 log "Installing apt dependencies..."
 sudo apt update
-sudo apt install -y python3 python3-libgpiod x11-xserver-utils
+sudo apt install -y python3 python3-libgpiod python3-xlib
 
 log "Ensuring dialout group exists..."
 sudo groupadd -r -f dialout
@@ -13,14 +13,20 @@ Usage:
 """
 
 import configparser
+import ctypes
+import glob
 import logging
-import subprocess
+import os
+import select
 import time
 import sys
 import signal
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import gpiod
+from Xlib import display as xdisplay
+from Xlib import error as xerror
+from Xlib.ext import dpms, screensaver
 
 
 # ----------------------------
@@ -41,6 +47,50 @@ def setup_logger() -> logging.Logger:
 LOG = setup_logger()
 
 
+# ----------------------------
+# Timing
+# ----------------------------
+
+def sleep_until(deadline_ns: int):
+    """
+    Sleep until an absolute time.monotonic_ns() deadline.
+
+    Scheduling against absolute deadlines keeps pulse widths exact and stops
+    jitter from adding up across multi-press sequences. Since Python 3.11,
+    time.sleep() on Linux is backed by clock_nanosleep(CLOCK_MONOTONIC,
+    TIMER_ABSTIME); older versions wait in select(), which is less precise,
+    but the deadline is still recomputed for every sleep, so no drift builds up.
+    """
+    remaining = deadline_ns - time.monotonic_ns()
+    if remaining > 0:
+        time.sleep(remaining / 1e9)
+
+
+PR_SET_TIMERSLACK = 29
+PR_GET_TIMERSLACK = 30
+# Default kernel slack is 50us, 1us keeps press pulse widths tight.
+TIMER_SLACK_NS = 1000
+
+
+def set_timer_slack(slack_ns: int = TIMER_SLACK_NS):
+    """
+    Set timer slack of this (single-threaded) process via prctl().
+
+    Returns the previous slack so it can be restored, or None on failure.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        zero = ctypes.c_ulong(0)
+        prev = libc.prctl(PR_GET_TIMERSLACK, zero, zero, zero, zero)
+        if prev < 0 or libc.prctl(PR_SET_TIMERSLACK, ctypes.c_ulong(slack_ns), zero, zero, zero) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return prev
+    except (OSError, AttributeError) as e:
+        LOG.warning("Failed to set timer slack: %s", e)
+        return None
+
+
 # ----------------------------
 # Config models
 # ----------------------------
@@ -59,19 +109,66 @@ class PressConfig:
     gap_ms: float
     dim_presses: int
     brighten_presses: int
+    # Derived once, press timing works on time.monotonic_ns() deadlines.
+    dim_press_ns: int = field(init=False)
+    brighten_press_ns: int = field(init=False)
+    gap_ns: int = field(init=False)
+
+    def __post_init__(self):
+        self.dim_press_ns = int(self.dim_press_ms * 1e6)
+        self.brighten_press_ns = int(self.brighten_press_ms * 1e6)
+        self.gap_ns = int(self.gap_ms * 1e6)
 
 
 @dataclass
 class DPMSConfig:
     display: str
     poll_interval_ms: float
+    max_poll_interval_ms: float
     suspend_grace_ms: float
+    sysfs_path: str
+    # Derived once, the daemon loop works in seconds.
+    poll_interval_s: float = field(init=False)
+    max_poll_interval_s: float = field(init=False)
+    suspend_grace_s: float = field(init=False)
+
+    def __post_init__(self):
+        self.poll_interval_s = self.poll_interval_ms / 1000.0
+        self.max_poll_interval_s = self.max_poll_interval_ms / 1000.0
+        self.suspend_grace_s = self.suspend_grace_ms / 1000.0
 
 
 # ----------------------------
 # GPIO button emulation
 # ----------------------------
 
+# libgpiod v2 bindings provide request_lines(), v1 (Debian bookworm and older)
+# only has the per-line Chip.get_line() API.
+GPIOD_V2 = hasattr(gpiod, "request_lines")
+if GPIOD_V2:
+    from gpiod.line import Direction, Value
+
+
+def gpiochip_path(chip: str) -> str:
+    """
+    Resolve chip as accepted by v1 Chip() lookup (number, 'gpiochipN', label
+    or path) to the device path libgpiod v2 needs.
+    """
+    if chip.isdigit():
+        return f"/dev/gpiochip{chip}"
+    path = chip if chip.startswith("/") else f"/dev/{chip}"
+    if gpiod.is_gpiochip_device(path):
+        return path
+    for candidate in sorted(glob.glob("/dev/gpiochip*")):
+        if not gpiod.is_gpiochip_device(candidate):
+            continue
+        with gpiod.Chip(candidate) as c:
+            if c.get_info().label == chip:
+                return candidate
+    # Not found, let request_lines() report the error for this path.
+    return path
+
+
 class ButtonEmulator:
     """
     Emulate a button that shorts a signal to GND when pressed.
@@ -79,71 +176,118 @@ class ButtonEmulator:
     - Released: line is configured as INPUT (Hi-Z)
     - Pressed:  line is configured as OUTPUT driving LOW
     - After each press set INPUT again.
+
+    Both lines are requested once and kept for the lifetime of the object,
+    a press only reconfigures the direction of an already requested line.
+    Lines are addressed by index (BRIGHTEN/DIM) into the offsets tuple.
+    With libgpiod v2 both lines share a single line request, so switching
+    every line back to INPUT is one call.
     """
+    BRIGHTEN = 0
+    DIM = 1
+    NAMES = ("brighten", "dim")
+
     def __init__(self, gpio_cfg: GPIOConfig, consumer: str = "screen-brightnessd"):
         self.gpio_cfg = gpio_cfg
         self.consumer = consumer
-
-        self.chip = gpiod.Chip(gpio_cfg.chip)
-        self.line_brighten = self.chip.get_line(gpio_cfg.line_brighten)
-        self.line_dim = self.chip.get_line(gpio_cfg.line_dim)
-
-        self.out_flags = gpiod.LINE_REQ_DIR_OUT
-        self.in_flags = gpiod.LINE_REQ_DIR_IN
-
-        # Ensure both lines start in INPUT mode (Hi-Z).
-        self._set_input(self.line_brighten, "brighten")
-        self._set_input(self.line_dim, "dim")
-
-    def _set_input(self, line: gpiod.Line, name: str):
-        """Force INPUT (Hi-Z) and release immediately."""
+        self.offsets = (gpio_cfg.line_brighten, gpio_cfg.line_dim)
+
+        # Both lines start in INPUT mode (Hi-Z). Bias is left as-is on purpose,
+        # the pin pull-up is what keeps the button released.
+        if GPIOD_V2:
+            in_settings = gpiod.LineSettings(direction=Direction.INPUT)
+            out_settings = gpiod.LineSettings(direction=Direction.OUTPUT, output_value=Value.INACTIVE)
+            # Reconfiguration covers every line of the request, so prebuild
+            # full configs: all lines INPUT, and one per pressed line.
+            self.input_config = {self.offsets: in_settings}
+            self.press_configs = tuple(
+                {offset: out_settings if i == pressed else in_settings
+                 for i, offset in enumerate(self.offsets)}
+                for pressed in range(len(self.offsets))
+            )
+            self.req = gpiod.request_lines(gpiochip_path(gpio_cfg.chip), consumer=consumer, config=self.input_config)
+        else:
+            # v1 bulk requests share one direction for all lines, so each line
+            # keeps its own request there.
+            self.chip = gpiod.Chip(gpio_cfg.chip)
+            self.lines = []
+            for offset in self.offsets:
+                line = self.chip.get_line(offset)
+                line.request(consumer=consumer, type=gpiod.LINE_REQ_DIR_IN)
+                self.lines.append(line)
+        LOG.info("GPIO lines brighten=%d, dim=%d requested as INPUT (Hi-Z)", *self.offsets)
+
+    def _set_input(self, index: int):
+        """Switch requested line back to INPUT (Hi-Z)."""
+        name = self.NAMES[index]
         try:
-            line.request(consumer=self.consumer, type=self.in_flags)
-            LOG.info("GPIO '%s' set to INPUT (Hi-Z)", name)
+            if GPIOD_V2:
+                self.req.reconfigure_lines(self.input_config)
+            else:
+                self.lines[index].set_direction_input()
+            LOG.debug("GPIO '%s' set to INPUT (Hi-Z)", name)
         except Exception as e:
             LOG.warning("Failed to set GPIO '%s' to INPUT: %s", name, e)
-        finally:
-            try:
-                line.release()
-            except Exception as e:
-                LOG.warning("Failed to release GPIO '%s' after INPUT request: %s", name, e)
 
-    def _press_line(self, line: gpiod.Line, name: str, press_ms: float):
-        """Drive LOW for press_ms seconds, then return to INPUT."""
+    def _set_all_input(self):
+        """Switch every requested line back to INPUT (Hi-Z), in one call with v2."""
+        if not GPIOD_V2:
+            for index in range(len(self.offsets)):
+                self._set_input(index)
+            return
         try:
-            line.request(consumer=self.consumer, type=self.out_flags, default_vals=[0])
-            LOG.info("GPIO '%s' pressed (OUTPUT LOW) for %.0fms", name, press_ms)
+            self.req.reconfigure_lines(self.input_config)
+            LOG.debug("GPIO lines set to INPUT (Hi-Z)")
         except Exception as e:
-            LOG.error("Failed to request GPIO '%s' as OUTPUT LOW: %s", name, e)
-            return
-
-        time.sleep(press_ms/1000.0)
-
+            LOG.warning("Failed to set GPIO lines to INPUT: %s", e)
+
+    def _press_line(self, index: int, press_ms: float, release_at_ns: int = None):
+        """
+        Drive LOW for press_ms, then return to INPUT.
+
+        If release_at_ns (time.monotonic_ns() based) is given, the line is
+        released exactly at that time instead of press_ms from now.
+        """
+        name = self.NAMES[index]
+        if release_at_ns is None:
+            release_at_ns = time.monotonic_ns() + int(press_ms * 1e6)
         try:
-            line.release()
+            if GPIOD_V2:
+                self.req.reconfigure_lines(self.press_configs[index])
+            else:
+                self.lines[index].set_direction_output(0)
+            LOG.debug("GPIO '%s' pressed (OUTPUT LOW) for %.0fms", name, press_ms)
         except Exception as e:
-            LOG.warning("Failed to release GPIO '%s' after press: %s", name, e)
+            LOG.error("Failed to set GPIO '%s' as OUTPUT LOW: %s", name, e)
+            return
+
+        sleep_until(release_at_ns)
 
         # Always return to INPUT after a press.
-        self._set_input(line, name)
+        self._set_input(index)
 
-    def click_brighten(self, press_ms: float):
-        self._press_line(self.line_brighten, "brighten", press_ms)
+    def click_brighten(self, press_ms: float, release_at_ns: int = None):
+        self._press_line(self.BRIGHTEN, press_ms, release_at_ns)
 
-    def click_dim(self, press_ms: float):
-        self._press_line(self.line_dim, "dim", press_ms)
+    def click_dim(self, press_ms: float, release_at_ns: int = None):
+        self._press_line(self.DIM, press_ms, release_at_ns)
 
     def close(self):
-        """Failsafe: return both lines to INPUT on shutdown."""
+        """Failsafe: return both lines to INPUT and release them on shutdown."""
         LOG.info("Shutting down: returning GPIO lines to INPUT")
-        try:
-            self._set_input(self.line_brighten, "brighten")
-        except Exception as e:
-            LOG.warning("Unexpected error while setting brighten INPUT: %s", e)
-        try:
-            self._set_input(self.line_dim, "dim")
-        except Exception as e:
-            LOG.warning("Unexpected error while setting dim INPUT: %s", e)
+        self._set_all_input()
+        if GPIOD_V2:
+            try:
+                self.req.release()
+            except Exception as e:
+                LOG.warning("Failed to release GPIO lines: %s", e)
+            return
+
+        for offset, line in zip(self.offsets, self.lines):
+            try:
+                line.release()
+            except Exception as e:
+                LOG.warning("Failed to release GPIO line %d: %s", offset, e)
         try:
             self.chip.close()
         except Exception as e:
@@ -154,35 +298,120 @@ class ButtonEmulator:
 # DPMS query
 # ----------------------------
 
-def read_dpms_state(display: str) -> str:
+DPMS_STATES = {
+    dpms.DPMSModeOn: "On",
+    dpms.DPMSModeStandby: "Standby",
+    dpms.DPMSModeSuspend: "Suspend",
+    dpms.DPMSModeOff: "Off",
+}
+
+# States in which the monitor is considered off and the screen gets dimmed.
+OFF_STATES = frozenset({"Off", "Suspend", "Standby"})
+
+
+# X server not up yet (boot) or gone (e.g. KlipperScreen restart).
+X_CONNECTION_ERRORS = (xerror.DisplayError, xerror.ConnectionClosedError)
+
+
+def open_display(name: str):
     """
-    Returns one of: 'On', 'Off', 'Suspend', 'Standby', or 'Unknown'.
+    Open the X display once; the connection is reused for every DPMS query.
 
-    Uses:
-      xset -display :0 q
-    and parses lines like:
-      "Monitor is On"
-      "Monitor is in Suspend"
-    We take the last token as the state (after stripping).
+    Also subscribes to ScreenSaverNotify events, so the daemon is woken up
+    right away when the X screensaver kicks in or goes away.
+    Returns None if the X server can't be reached, caller retries later.
     """
+    display = None
+    try:
+        display = xdisplay.Display(name)
+        if not display.has_extension("DPMS"):
+            LOG.warning("X server on DISPLAY=%s has no DPMS extension, state will be Unknown", name)
+        if display.has_extension("MIT-SCREEN-SAVER"):
+            display.screen().root.screensaver_select_input(screensaver.NotifyMask)
+            display.flush()
+        else:
+            LOG.warning("X server on DISPLAY=%s has no MIT-SCREEN-SAVER extension, relying on polling only", name)
+    except X_CONNECTION_ERRORS as e:
+        LOG.warning("Cannot connect to X server on DISPLAY=%s, will retry: %s", name, e)
+        if display is not None:
+            close_display(display)
+        return None
+    return display
+
+
+def close_display(display: xdisplay.Display):
+    """Close X connection; a dead connection re-raises its error on close, ignore it."""
     try:
-        out = subprocess.check_output(
-            ["xset", "-display", display, "q"],
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
+        display.close()
     except Exception as e:
-        LOG.warning("Failed to query DPMS via xset (DISPLAY=%s): %s", display, e)
+        LOG.debug("Error while closing X connection: %s", e)
+
+
+def drain_events(display: xdisplay.Display):
+    """
+    Discard queued X events, they are only used as a wake-up.
+
+    Raises ConnectionClosedError once the X server went away.
+    """
+    while display.pending_events():
+        display.next_event()
+
+
+def read_dpms_state(display: xdisplay.Display) -> str:
+    """
+    Returns one of: 'On', 'Off', 'Suspend', 'Standby', or 'Unknown'.
+
+    Asks the X server directly through the DPMS extension (DPMSInfo request)
+    and maps the reported power level to the state name.
+    'Unknown' is returned when DPMS is missing or disabled, like xset does
+    by not printing the "Monitor is ..." line.
+    Lost connection (X_CONNECTION_ERRORS) is raised, so the caller can drop
+    the handle and reconnect.
+    """
+    if not display.has_extension("DPMS"):
         return "Unknown"
 
-    for line in out.splitlines():
-        s = line.strip()
-        if s.startswith("Monitor is"):
-            try:
-                return s.rsplit(None, 1)[-1]
-            except Exception:
-                return "Unknown"
-    return "Unknown"
+    try:
+        info = display.dpms_info()
+    except xerror.XError as e:
+        LOG.warning("Failed to query DPMS info: %s", e)
+        return "Unknown"
+
+    if not info.state:
+        return "Unknown"
+    return DPMS_STATES.get(info.power_level, "Unknown")
+
+
+SYSFS_DPMS_STATES = {
+    b"On\n": "On",
+    b"Standby\n": "Standby",
+    b"Suspend\n": "Suspend",
+    b"Off\n": "Off",
+}
+
+
+def open_sysfs_dpms(path: str):
+    """Open DRM connector 'dpms' attribute, returns fd or None if unavailable."""
+    try:
+        return os.open(path, os.O_RDONLY)
+    except OSError as e:
+        LOG.warning("Cannot open DPMS sysfs attribute %s, falling back to X DPMS: %s", path, e)
+        return None
+
+
+def read_sysfs_dpms_state(fd: int) -> str:
+    """
+    Returns one of: 'On', 'Off', 'Suspend', 'Standby', or 'Unknown'.
+
+    Reads DRM connector 'dpms' attribute (e.g. /sys/class/drm/card0-HDMI-A-1/dpms)
+    from the already opened fd; reading at offset 0 always returns fresh value.
+    """
+    try:
+        raw = os.pread(fd, 16, 0)
+    except OSError as e:
+        LOG.warning("Failed to read DPMS sysfs attribute: %s", e)
+        return "Unknown"
+    return SYSFS_DPMS_STATES.get(raw, "Unknown")
 
 
 # ----------------------------
@@ -194,10 +423,15 @@ def load_config(path: str):
     if not cfg.read(path):
         raise FileNotFoundError(f"Cannot read config: {path}")
 
+    poll_interval_ms = cfg.getfloat("dpms", "poll_interval_ms", fallback=1000.0)
     dpms = DPMSConfig(
         display=cfg.get("dpms", "display", fallback=":0"),
-        poll_interval_ms=cfg.getfloat("dpms", "poll_interval_ms", fallback=1000.0),
+        poll_interval_ms=poll_interval_ms,
+        # Never below poll_interval_ms; defaults to it, which disables backoff.
+        max_poll_interval_ms=max(poll_interval_ms, cfg.getfloat("dpms", "max_poll_interval_ms",
+                                                                fallback=poll_interval_ms)),
         suspend_grace_ms=cfg.getfloat("dpms", "suspend_grace_ms", fallback=5000.0),
+        sysfs_path=cfg.get("dpms", "sysfs_path", fallback=""),
     )
 
     gpio = GPIOConfig(
@@ -210,8 +444,8 @@ def load_config(path: str):
         dim_press_ms=cfg.getint("press", "dim_press_ms", fallback=2000),
         brighten_press_ms=cfg.getint("press", "brighten_press_ms", fallback=2000),
         gap_ms=cfg.getint("press", "gap_ms", fallback=50),
-        dim_presses=cfg.getint("press", "dim_presses", fallback=1),
-        brighten_presses=cfg.getint("press", "brighten_presses", fallback=1),
+        dim_presses=max(0, cfg.getint("press", "dim_presses", fallback=1)),
+        brighten_presses=max(0, cfg.getint("press", "brighten_presses", fallback=1)),
     )
 
     return dpms, gpio, press
@@ -224,18 +458,32 @@ def load_config(path: str):
 def do_clicks(action_name: str, be: ButtonEmulator, press_cfg: PressConfig):
     if action_name == "dim":
         click_fn = be.click_dim
-        presses = max(0, int(press_cfg.dim_presses))
+        presses = press_cfg.dim_presses
         press_ms = press_cfg.dim_press_ms
+        press_ns = press_cfg.dim_press_ns
     else:
         click_fn = be.click_brighten
-        presses = max(0, int(press_cfg.brighten_presses))
+        presses = press_cfg.brighten_presses
         press_ms = press_cfg.brighten_press_ms
+        press_ns = press_cfg.brighten_press_ns
     LOG.info("%s: presses=%d, press=%.0fms, gap=%.0fms",
              action_name, presses, press_ms, press_cfg.gap_ms)
-    for i in range(presses):
-        click_fn(press_ms)
-        if i < presses - 1:
-            time.sleep(press_cfg.gap_ms/1000.0)
+    # Every press starts and ends on a precomputed schedule, so jitter in one
+    # press does not shift the following ones.
+    gap_ns = press_cfg.gap_ns
+    # Tight slack only while pulses run, idle waits keep the kernel's wakeup batching.
+    prev_slack = set_timer_slack()
+    try:
+        deadline = time.monotonic_ns()
+        for i in range(presses):
+            if i > 0:
+                sleep_until(deadline)
+            deadline += press_ns
+            click_fn(press_ms, deadline)
+            deadline += gap_ns
+    finally:
+        if prev_slack is not None:
+            set_timer_slack(prev_slack)
 
 
 # ----------------------------
@@ -281,6 +529,9 @@ def run_test(config_path: str):
 
 def run_daemon(config_path: str):
     dpms_cfg, gpio_cfg, press_cfg = load_config(config_path)
+    # Prefer DRM sysfs when configured, X server is only used as a fallback.
+    sysfs_fd = open_sysfs_dpms(dpms_cfg.sysfs_path) if dpms_cfg.sysfs_path else None
+    display = open_display(dpms_cfg.display) if sysfs_fd is None else None
     be = ButtonEmulator(gpio_cfg)
 
     stop = False
@@ -290,61 +541,147 @@ def run_daemon(config_path: str):
         LOG.info("Signal %s received, shutting down...", signum)
         stop = True
 
+    def shutdown(dimmed: bool):
+        """
+        Single exit path: restore brightness, return GPIO to INPUT, free resources.
+
+        Runs only from the main loop's finally block; the signal handler just
+        sets stop, so multi-second presses never run inside a signal handler.
+        """
+        try:
+            if dimmed:
+                LOG.info("exit signal detected while screen was dim, brightening screen.")
+                do_clicks("brighten", be, press_cfg)
+        except Exception as e:
+            LOG.warning("tried to brighten screen on exit but failed: %s", e)
+        be.close()
+        signal.set_wakeup_fd(-1)
+        for fd in (wake_r, wake_w, sysfs_fd):
+            if fd is None:
+                continue
+            try:
+                os.close(fd)
+            except Exception as e:
+                LOG.warning("Failed to close fd %d: %s", fd, e)
+        if display is not None:
+            close_display(display)
+        LOG.info("screen-brightnessd stopped (GPIO lines returned to INPUT).")
+
     signal.signal(signal.SIGINT, handle_sig)
     signal.signal(signal.SIGTERM, handle_sig)
 
+    def drop_display(e: Exception):
+        """Forget a dead X connection, the loop reconnects on a later poll."""
+        nonlocal display
+        LOG.warning("Lost connection to X server on DISPLAY=%s, will reconnect: %s", dpms_cfg.display, e)
+        close_display(display)
+        display = None
+
+    # Signals write to this pipe, so they wake up the select() below.
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+
+    # Everything the loop touches is bound to locals once, the values never change.
+    monotonic = time.monotonic
+    wait = select.select
+    poll_s = dpms_cfg.poll_interval_s
+    max_poll_s = dpms_cfg.max_poll_interval_s
+    grace_s = dpms_cfg.suspend_grace_s
+    brighten_n = press_cfg.brighten_presses
+    dim_n = press_cfg.dim_presses
+
     last_state = None
     off_since = None
     dimmed = False
+    cur_interval_s = poll_s
 
     LOG.info("screen-brightnessd started.")
-    LOG.info("Monitoring DPMS on DISPLAY=%s (poll=%.0fms, grace=%.0fms)",
-             dpms_cfg.display, dpms_cfg.poll_interval_ms, dpms_cfg.suspend_grace_ms)
+    LOG.info("Monitoring DPMS on %s (poll=%.0f-%.0fms, grace=%.0fms)",
+             dpms_cfg.sysfs_path if sysfs_fd is not None else f"DISPLAY={dpms_cfg.display}",
+             dpms_cfg.poll_interval_ms, dpms_cfg.max_poll_interval_ms, dpms_cfg.suspend_grace_ms)
     LOG.info("GPIO: chip=%s, brighten=%d, dim=%d", gpio_cfg.chip, gpio_cfg.line_brighten, gpio_cfg.line_dim)
 
     try:
         while not stop:
-            state = read_dpms_state(dpms_cfg.display)
-
-            if state != last_state:
+            if sysfs_fd is not None:
+                state = read_sysfs_dpms_state(sysfs_fd)
+            else:
+                if display is None:
+                    display = open_display(dpms_cfg.display)
+                state = "Unknown"
+                if display is not None:
+                    try:
+                        state = read_dpms_state(display)
+                    except X_CONNECTION_ERRORS as e:
+                        drop_display(e)
+
+            is_off = state in OFF_STATES
+            changed = state != last_state
+            if changed:
                 LOG.info("DPMS state changed: %s -> %s", last_state, state)
 
                 # Transition to On: brighten if we previously dimmed, ignore on start
                 if state == "On":
                     off_since = None
-                    if dimmed and press_cfg.brighten_presses > 0:
+                    if dimmed and brighten_n > 0:
                         do_clicks("brighten", be, press_cfg)
                     dimmed = False
 
-                # Transition to Off/Suspend/Standby: start timer
-                if state in ("Off", "Suspend", "Standby"):
-                    if off_since is None:
-                        off_since = time.monotonic()
-
                 last_state = state
 
-            # If still Off/Suspend/Standby and grace elapsed: dim once
-            if state in ("Off", "Suspend", "Standby"):
+            # Off/Suspend/Standby: start timer, dim once grace elapsed
+            if is_off:
                 if off_since is None:
-                    off_since = time.monotonic()
+                    off_since = monotonic()
 
-                elapsed = time.monotonic() - off_since
-                if (not dimmed) and (elapsed >= dpms_cfg.suspend_grace_ms/1000.0):
-                    if press_cfg.dim_presses > 0:
+                elapsed = monotonic() - off_since
+                if (not dimmed) and (elapsed >= grace_s):
+                    if dim_n > 0:
                         do_clicks("dim", be, press_cfg)
                     dimmed = True
 
-            time.sleep(dpms_cfg.poll_interval_ms/1000.0)
+            # Back off while the screen stays on. Waking the screen up must be
+            # noticed quickly, so Off/Suspend/Standby always polls at base rate.
+            if changed or is_off:
+                cur_interval_s = poll_s
+            else:
+                cur_interval_s = min(cur_interval_s * 2, max_poll_s)
+
+            # DPMS itself has no events, so keep polling at cur_interval_s,
+            # but wake up earlier for X events, signals or the grace deadline.
+            timeout = cur_interval_s
+            # Only while still off: off_since survives Off -> Unknown, and a
+            # clamp past the deadline would make select() spin with timeout 0.
+            if is_off and not dimmed:
+                remaining = off_since + grace_s - monotonic()
+                timeout = max(0.0, min(timeout, remaining))
+            # Events queued while reading the state are already accounted for.
+            if display is not None:
+                try:
+                    drain_events(display)
+                except X_CONNECTION_ERRORS as e:
+                    drop_display(e)
+
+            # X connection fd changes on reconnect and is missing while disconnected.
+            display_fd = display.fileno() if display is not None else None
+            wait_fds = [wake_r] if display_fd is None else [wake_r, display_fd]
+            readable, _, _ = wait(wait_fds, [], [], timeout)
+            if display_fd in readable:
+                # A dead connection stays readable at EOF, reading it raises.
+                try:
+                    drain_events(display)
+                except X_CONNECTION_ERRORS as e:
+                    drop_display(e)
+            if wake_r in readable:
+                try:
+                    os.read(wake_r, 64)
+                except BlockingIOError:
+                    pass
 
     finally:
-        try:
-            if dimmed == True:
-                LOG.info("exit signal detected while screen was dim, brightening screen.")
-                do_clicks("brighten", be, press_cfg)
-        except:
-            LOG.warning("tried to brighten screen on exit but failed.")
-        be.close()
-        LOG.info("screen-brightnessd stopped (GPIO lines returned to INPUT).")
+        shutdown(dimmed)
 
 
 # ----------------------------